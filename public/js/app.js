@@ -102,7 +102,11 @@ class STLConverter {
     this.fileInput.addEventListener('change', (e) => this.handleFileSelect(e));
 
     // Tolerance slider
+    // Tolerance is only sent once the user moves the slider; otherwise the
+    // server derives it from the mesh size
+    this.toleranceTouched = false;
     this.toleranceInput.addEventListener('input', () => {
+      this.toleranceTouched = true;
       this.toleranceValue.textContent = this.toleranceInput.value;
     });
 
@@ -369,7 +373,9 @@ class STLConverter {
   async uploadFile(file) {
     const formData = new FormData();
     formData.append('meshFile', file);  // Changed from 'stlFile' to match backend
-    formData.append('tolerance', this.toleranceInput.value);
+    if (this.toleranceTouched) {
+      formData.append('tolerance', this.toleranceInput.value);
+    }
     formData.append('repair', this.repairMeshCheckbox.checked);
     formData.append('skipFaceMerge', this.skipFaceMergeCheckbox.checked);
 
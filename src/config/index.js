@@ -45,11 +45,12 @@ module.exports = {
 
   // Conversion settings
   conversion: {
-    defaultTolerance: parseFloat(process.env.DEFAULT_TOLERANCE) || 0.01,
+    defaultTolerance: parseFloat(process.env.DEFAULT_TOLERANCE) || null, // null = derive from mesh size
     minTolerance: 0.001,
     maxTolerance: 1.0,
     timeout: parseInt(process.env.CONVERSION_TIMEOUT, 10) || 1800000, // 30 minutes
     repairMesh: process.env.REPAIR_MESH !== 'false', // Default true
+    persistentWorker: process.env.PERSISTENT_WORKER !== 'false', // Keep FreeCAD loaded between jobs
   },
 
   // Job settings
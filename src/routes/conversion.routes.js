@@ -100,6 +100,7 @@ router.post(
       const outputPath = fileService.getConvertedPath(`${jobId}.step`);
 
       const options = {
+        // Omitted when the user didn't pick one; null means derive it from the mesh
         tolerance: parseFloat(req.body.tolerance) || config.conversion.defaultTolerance,
         repair: req.body.repair !== 'false',
         skipFaceMerge: req.body.skipFaceMerge === 'true',
@@ -6,7 +6,44 @@ import json
 import zipfile
 import tempfile
 import shutil
+from collections import OrderedDict
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import xml.etree.ElementTree as ET
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+except ImportError:
+    cKDTree = None
+
+# Batch mode keeps loaded STL meshes keyed by (path, mtime, size) so repeated
+# entries for the same file skip the disk read. Sized by file bytes; server mode
+# never enables it since every upload path is unique.
+MESH_CACHE_MAX_BYTES = 256 * 1024 * 1024
+_mesh_cache = None
+_mesh_cache_bytes = 0
+
+# Range a tolerance derived from mesh size is clamped to; matches
+# conversion.minTolerance/maxTolerance in src/config
+MIN_TOLERANCE = 0.001
+MAX_TOLERANCE = 1.0
+
+# Below this many facets the process pool costs more than per-component repair saves
+PARALLEL_REPAIR_MIN_FACETS = 20000
+
+# Planar-region conversion needs at least this share of facets in planar regions;
+# below it the leftover triangles would be sewn twice for little face reduction
+PLANAR_MIN_COVERAGE = 0.5
+
+# Component batches handed to forked repair workers, set only while they run
+_parallel_batches = None
+
+# removeSplitter is only worth running when the shape still has more than this
+# many faces per source facet, i.e. coplanar facets were not merged upstream
+FACE_MERGE_RATIO = 0.1
 
 # Save original stdout for final JSON output
 ORIGINAL_STDOUT_FD = os.dup(1)
@@ -32,7 +69,6 @@ try:
     import Part
     import Mesh
     import MeshPart
-    import Import
     debug_print("FreeCAD modules imported successfully")
 except Exception as e:
     os.dup2(ORIGINAL_STDOUT_FD, 1)
@@ -44,12 +80,18 @@ except Exception as e:
     sys.exit(0)
 
 
-def clean_exit(result):
+def to_json(result, pretty=False):
+    if pretty:
+        return json.dumps(result, indent=2)
+    return json.dumps(result, separators=(',', ':'))
+
+
+def clean_exit(result, pretty=False):
     """Restore stdout, print JSON, hard exit"""
     debug_print("Restoring stdout for JSON output")
     os.dup2(ORIGINAL_STDOUT_FD, 1)
     sys.stdout = os.fdopen(ORIGINAL_STDOUT_FD, 'w')
-    print(json.dumps(result, indent=2))
+    print(to_json(result, pretty))
     sys.stdout.flush()
     os._exit(0)
 
@@ -62,8 +104,9 @@ def get_mesh_info(mesh, skip_expensive=False):
         "edges": mesh.CountEdges,
     }
 
-    info["is_solid"] = mesh.isSolid()
-    info["volume"] = mesh.Volume if info["is_solid"] else None
+    is_solid = mesh.isSolid()
+    info["is_solid"] = is_solid
+    info["volume"] = mesh.Volume if is_solid else None
     info["area"] = mesh.Area
 
     if not skip_expensive:
@@ -77,23 +120,115 @@ def get_mesh_info(mesh, skip_expensive=False):
     return info
 
 
-def repair_mesh(mesh, skip_expensive=False):
-    debug_print("Starting mesh repair")
+def mesh_to_arrays(mesh):
+    """Return (points, facets) numpy arrays from mesh topology"""
+    points, facets = mesh.Topology
+    points = np.array([(p.x, p.y, p.z) for p in points], dtype=np.float64).reshape(-1, 3)
+    facets = np.array(facets, dtype=np.int32).reshape(-1, 3)
+    return points, facets
+
+
+def mesh_from_arrays(points, facets):
+    """Build a mesh from (points, facets) numpy arrays"""
+    mesh = Mesh.Mesh()
+    mesh.addFacets(points[facets].tolist())
+    return mesh
+
+
+def dedupe_points_kdtree(points, facets, tolerance):
+    """Merge points closer than tolerance, returns (points, facets, merged_count).
+
+    Unlike Mesh.removeDuplicatedPoints this also catches near-duplicates that
+    differ by float noise. Facets collapsed by the merge are dropped.
+    """
+    pairs = cKDTree(points).query_pairs(tolerance, output_type='ndarray')
+    if len(pairs) == 0:
+        return points, facets, 0
+
+    # Union-find over the pair graph: each connected component is one point
+    n = len(points)
+    graph = coo_matrix((np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+    count, labels = connected_components(graph, directed=False)
+
+    # Keep the lowest original index of each class as its representative
+    representative = np.full(count, n, dtype=np.int64)
+    np.minimum.at(representative, labels, np.arange(n))
+
+    facets = labels[facets]
+    valid = (facets[:, 0] != facets[:, 1]) & (facets[:, 1] != facets[:, 2]) & (facets[:, 0] != facets[:, 2])
+    return points[representative], facets[valid], n - count
+
+
+def dedupe_facets_np(facets):
+    """Drop facets using the same three points, keeping first occurrence order"""
+    sorted_tri = np.ascontiguousarray(np.sort(facets, axis=1), dtype=np.int32)
+    view = sorted_tri.view([('a', 'i4'), ('b', 'i4'), ('c', 'i4')]).reshape(-1)
+    _, keep = np.unique(view, return_index=True)
+    if len(keep) == len(facets):
+        return facets
+    return facets[np.sort(keep)]
+
+
+def dedupe_mesh(mesh, skip_expensive=False, mesh_info=None, tolerance=0.01):
+    """Remove duplicate points and facets, returns (mesh, repairs, mesh_info).
+
+    mesh_info comes back empty if the mesh changed, since its flags no longer apply.
+    """
     repairs = []
+    mesh_info = mesh_info or {}
+
+    if cKDTree is not None and not skip_expensive and mesh.CountFacets > 0:
+        # The tolerant merge needs the topology as arrays; dedupe facets while
+        # they are there so the mesh is rebuilt at most once. The array round
+        # trip is Python-level, so large meshes keep the native calls below.
+        merge_distance = tolerance * 0.01
+        debug_print(f"Merging points closer than {merge_distance}...")
+        points, facets = mesh_to_arrays(mesh)
+        points, facets, merged = dedupe_points_kdtree(points, facets, merge_distance)
+        if merged:
+            repairs.append(f"Removed {merged} duplicate points")
+
+        before_f = len(facets)
+        facets = dedupe_facets_np(facets)
+        if len(facets) < before_f:
+            repairs.append(f"Removed {before_f - len(facets)} duplicate facets")
+
+        if merged or len(facets) < before_f:
+            mesh = mesh_from_arrays(points, facets)
+            # The "before" flags describe a mesh that no longer exists
+            mesh_info = {}
+    else:
+        before_pts = mesh.CountPoints
+        mesh.removeDuplicatedPoints()
+        if mesh.CountPoints < before_pts:
+            repairs.append(f"Removed {before_pts - mesh.CountPoints} duplicate points")
 
-    before_pts = mesh.CountPoints
-    mesh.removeDuplicatedPoints()
-    if mesh.CountPoints < before_pts:
-        repairs.append(f"Removed {before_pts - mesh.CountPoints} duplicate points")
+        before_f = mesh.CountFacets
+        mesh.removeDuplicatedFacets()
+        if mesh.CountFacets < before_f:
+            repairs.append(f"Removed {before_f - mesh.CountFacets} duplicate facets")
 
-    before_f = mesh.CountFacets
-    mesh.removeDuplicatedFacets()
-    if mesh.CountFacets < before_f:
-        repairs.append(f"Removed {before_f - mesh.CountFacets} duplicate facets")
+        if mesh.CountPoints < before_pts or mesh.CountFacets < before_f:
+            # The "before" flags describe a mesh that no longer exists
+            mesh_info = {}
+
+    return mesh, repairs, mesh_info
+
+
+def fix_mesh(mesh, skip_expensive=False, mesh_info=None):
+    """Fix self-intersections, degenerations, non-manifolds, holes and normals.
+
+    Returns (mesh, repairs). mesh_info's self-intersection flag is reused if set.
+    """
+    repairs = []
+    mesh_info = mesh_info or {}
 
     if not skip_expensive:
-        debug_print("Checking self-intersections for repair...")
-        if mesh.hasSelfIntersections():
+        has_self_intersections = mesh_info.get("has_self_intersections")
+        if has_self_intersections is None:
+            debug_print("Checking self-intersections for repair...")
+            has_self_intersections = mesh.hasSelfIntersections()
+        if has_self_intersections:
             debug_print("Fixing self-intersections...")
             mesh.fixSelfIntersections()
             if not mesh.hasSelfIntersections():
@@ -113,8 +248,11 @@ def repair_mesh(mesh, skip_expensive=False):
             pass
 
     if not skip_expensive:
-        debug_print("Removing non-manifolds...")
+        # Always re-check: fixing self-intersections and degenerations can
+        # create non-manifold edges
+        debug_print("Checking non-manifolds...")
         if mesh.hasNonManifolds():
+            debug_print("Removing non-manifolds...")
             try:
                 mesh.removeNonManifolds()
                 if not mesh.hasNonManifolds():
@@ -139,10 +277,92 @@ def repair_mesh(mesh, skip_expensive=False):
     mesh.harmonizeNormals()
     repairs.append("Harmonized normals")
 
-    debug_print(f"Mesh repair complete: {len(repairs)} operations")
     return mesh, repairs
 
 
+def needs_face_merge(shape, facet_count):
+    """True if the shape still looks like one face per facet"""
+    face_count = len(shape.Faces)
+    debug_print(f"Shape has {face_count} faces for {facet_count} facets")
+    return face_count > FACE_MERGE_RATIO * facet_count
+
+
+def _fix_batch(index, skip_expensive, mesh_info, out_dir):
+    """Worker entry point - fixes one batch of components inherited through fork.
+
+    Meshes are not picklable, so the result goes back as a native .bms file.
+    """
+    mesh, repairs = fix_mesh(_parallel_batches[index], skip_expensive, mesh_info)
+    path = os.path.join(out_dir, f"{index}.bms")
+    mesh.write(path)
+    return path, repairs
+
+
+def split_into_batches(components, count):
+    """Group components into count meshes of roughly equal facet count"""
+    batches = [Mesh.Mesh() for _ in range(count)]
+    for component in sorted(components, key=lambda c: c.CountFacets, reverse=True):
+        min(batches, key=lambda b: b.CountFacets).addMesh(component)
+    return batches
+
+
+def repair_mesh(mesh, skip_expensive=False, mesh_info=None, tolerance=0.01):
+    """Repair mesh, running the expensive fixes on disconnected components in parallel.
+
+    mesh_info is the "before" info from get_mesh_info; its self-intersection flag
+    is reused instead of re-scanning, as long as dedup left the mesh unchanged.
+    Duplicates are removed on the whole mesh first so near-coincident pieces are
+    welded before splitting. Components are grouped into one batch per worker.
+    Falls back to serial fixing for single-component or small meshes, or if the
+    worker pool cannot be used. Returns (mesh, repairs).
+    """
+    global _parallel_batches
+    debug_print("Starting mesh repair")
+    mesh, repairs, mesh_info = dedupe_mesh(mesh, skip_expensive, mesh_info, tolerance)
+
+    components = mesh.getSeparateComponents() if mesh.CountFacets >= PARALLEL_REPAIR_MIN_FACETS else []
+    workers = min(os.cpu_count() or 1, len(components))
+    if workers < 2:
+        mesh, fixes = fix_mesh(mesh, skip_expensive, mesh_info)
+        repairs.extend(fixes)
+        debug_print(f"Mesh repair complete: {len(repairs)} operations")
+        return mesh, repairs
+
+    # A clean flag on the whole mesh holds for every component, a dirty one may not
+    batch_info = {k: v for k, v in mesh_info.items() if v is False}
+    _parallel_batches = split_into_batches(components, workers)
+    debug_print(f"Repairing {len(components)} components in {workers} batches...")
+
+    out_dir = tempfile.mkdtemp(prefix='repair_')
+    try:
+        # FreeCAD's Mesh module is not thread-safe but survives fork; workers
+        # read their batch from the inherited _parallel_batches
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(_fix_batch, i, skip_expensive, batch_info, out_dir) for i in range(workers)]
+            results = [f.result() for f in futures]
+
+        repaired = Mesh.Mesh()
+        for path, _ in results:
+            repaired.addMesh(Mesh.Mesh(path))
+    except Exception as e:
+        debug_print(f"Parallel repair failed: {e}, repairing serially")
+        mesh, fixes = fix_mesh(mesh, skip_expensive, mesh_info)
+        repairs.extend(fixes)
+        return mesh, repairs
+    finally:
+        _parallel_batches = None
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    # Summarize instead of listing every operation for every batch
+    repairs.append(f"Repaired {len(components)} separate components in parallel")
+    for fix in dict.fromkeys(r for _, batch_repairs in results for r in batch_repairs):
+        repairs.append(fix)
+
+    debug_print(f"Parallel repair complete: {len(repairs)} operations")
+    return repaired, repairs
+
+
 def merge_planar_faces(shape, tolerance=0.01):
     debug_print("Attempting to merge planar faces...")
     try:
@@ -172,12 +392,125 @@ def merge_planar_faces(shape, tolerance=0.01):
                 return shape, False
 
 
-def load_stl_file(input_path):
-    """Load STL file and return mesh"""
+def triangles_to_shape(mesh, sew_tolerance=0.05):
+    """One face per facet, sewn by makeShapeFromMesh"""
+    shape = Part.Shape()
+    if mesh.CountFacets > 0:
+        shape.makeShapeFromMesh(mesh.Topology, sew_tolerance)
+    return shape
+
+
+def mesh_to_shape(mesh, tolerance=0.01, sew_tolerance=0.05):
+    """Convert mesh to shape, building one face per coplanar facet region.
+
+    Planar regions become a single face bounded by their outline wires instead of
+    one face per triangle. Facets outside any planar region are converted as
+    triangles. All faces are sewn together afterwards. Mostly freeform meshes
+    skip the planar path, since it would only add a second sewing pass.
+    """
+    if mesh.CountFacets == 0:
+        return Part.Shape()
+
+    debug_print("Segmenting mesh into planar regions...")
+    try:
+        segments = [seg for seg in mesh.getPlanarSegments(tolerance) if len(seg) >= 2]
+    except Exception as e:
+        debug_print(f"Planar segmentation failed: {e}")
+        segments = []
+
+    planar_facets = sum(len(seg) for seg in segments)
+    if planar_facets < PLANAR_MIN_COVERAGE * mesh.CountFacets:
+        debug_print(f"Only {planar_facets} of {mesh.CountFacets} facets are in planar regions, converting as triangles")
+        return triangles_to_shape(mesh, sew_tolerance)
+
+    faces = []
+    covered = set()
+    for segment in segments:
+        try:
+            wires = MeshPart.wireFromSegment(mesh, segment)
+            if not wires:
+                continue
+            # Part.Face sorts outer boundary and holes itself
+            face = Part.Face(wires)
+            if not face.isValid():
+                continue
+            faces.append(face)
+            covered.update(segment)
+        except Exception as e:
+            debug_print(f"Skipping planar segment ({len(segment)} facets): {e}")
+
+    debug_print(f"Merged {len(covered)} facets into {len(faces)} planar faces")
+    if not covered:
+        return triangles_to_shape(mesh, sew_tolerance)
+
+    remaining = [i for i in range(mesh.CountFacets) if i not in covered]
+    if remaining:
+        debug_print(f"Converting {len(remaining)} remaining facets as triangles...")
+        faces.extend(triangles_to_shape(mesh.meshFromSegment(remaining), sew_tolerance).Faces)
+
+    debug_print(f"Sewing {len(faces)} faces...")
+    shape = Part.Compound(faces)
+    shape.sewShape(sew_tolerance)
+    return shape
+
+
+def make_solid(shape, mesh_is_solid=False):
+    """Build a solid from a shape.
+
+    When the mesh was already certified closed and the shape is a single closed
+    shell, wrap its faces directly instead of running the full makeSolid
+    heuristic. Multi-body shapes always go through makeSolid, which builds one
+    solid per shell.
+    """
+    if mesh_is_solid and len(shape.Shells) == 1 and shape.isClosed():
+        try:
+            solid = Part.Solid(Part.Shell(shape.Faces))
+            if solid.Volume < 0:
+                solid.reverse()
+            if solid.isValid():
+                debug_print("Closed shell - built solid directly")
+                return solid
+            debug_print("Direct solid is invalid, using makeSolid")
+        except Exception as e:
+            debug_print(f"Direct solid construction failed: {e}, using makeSolid")
+    return Part.makeSolid(shape)
+
+
+def cache_mesh(key, mesh, size):
+    """Keep a loaded mesh for later batch entries, evicting oldest past the byte cap"""
+    global _mesh_cache_bytes
+    if size > MESH_CACHE_MAX_BYTES:
+        return
+    _mesh_cache[key] = (mesh.copy(), size)
+    _mesh_cache_bytes += size
+    while _mesh_cache_bytes > MESH_CACHE_MAX_BYTES:
+        _, (_, evicted_size) = _mesh_cache.popitem(last=False)
+        _mesh_cache_bytes -= evicted_size
+
+
+def load_stl_file(input_path, cache=False):
+    """Load STL file and return mesh.
+
+    cache=True is for top-level inputs only; files extracted to temp dirs can
+    never be looked up again and would just evict real inputs.
+    """
+    cache_key = None
+    if cache and _mesh_cache is not None:
+        stat = os.stat(input_path)
+        cache_key = (input_path, stat.st_mtime_ns, stat.st_size)
+        cached = _mesh_cache.get(cache_key)
+        if cached is not None:
+            debug_print("Using cached STL mesh")
+            _mesh_cache.move_to_end(cache_key)
+            return cached[0].copy()
+
     debug_print("Reading STL file...")
     mesh = Mesh.Mesh()
     mesh.read(input_path)
     debug_print("STL file read complete")
+
+    if cache_key is not None:
+        cache_mesh(cache_key, mesh, stat.st_size)
     return mesh
 
 
@@ -303,24 +636,10 @@ def create_mesh_from_data(vertices, triangles):
     debug_print(f"Creating mesh from {len(vertices)} vertices and {len(triangles)} triangles")
     
     try:
-        # Create mesh object
-        mesh = Mesh.Mesh()
-        
-        # Build facets (triangles) from the data
-        facets = []
-        for tri in triangles:
-            v1_idx, v2_idx, v3_idx = tri
-            
-            # Get the actual vertex coordinates
-            v1 = vertices[v1_idx]
-            v2 = vertices[v2_idx]
-            v3 = vertices[v3_idx]
-            
-            # Create facet (triangle) - format: ((v1x,v1y,v1z), (v2x,v2y,v2z), (v3x,v3y,v3z))
-            facets.append((v1, v2, v3))
-        
-        # Add all facets to mesh
-        mesh.addFacets(facets)
+        # Resolve vertex indices to coordinates in one fancy-indexing pass
+        points = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        facets = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+        mesh = mesh_from_arrays(points, facets)
         
         debug_print(f"Mesh created successfully with {mesh.CountFacets} facets")
         return mesh
@@ -359,8 +678,7 @@ def load_3mf_file(input_path):
         if stl_files:
             debug_print(f"Loading {len(stl_files)} STL file(s)")
             for stl_path in stl_files:
-                mesh = Mesh.Mesh()
-                mesh.read(stl_path)
+                mesh = load_stl_file(stl_path)
                 debug_print(f"Loaded STL with {mesh.CountFacets} facets")
                 meshes.append(mesh)
         
@@ -403,7 +721,7 @@ def load_3mf_file(input_path):
             debug_print(f"Failed to clean up temp directory: {temp_dir}")
 
 
-def convert(input_path, output_path, tolerance=0.01, repair=True, info_only=False, input_format='stl', skip_face_merge=False):
+def convert(input_path, output_path, tolerance=None, repair=True, info_only=False, input_format='stl', skip_face_merge=False):
     debug_print("="*60)
     debug_print(f"CONVERSION STARTED")
     debug_print(f"Input: {input_path}")
@@ -425,23 +743,32 @@ def convert(input_path, output_path, tolerance=0.01, repair=True, info_only=Fals
     if not os.path.exists(input_path):
         debug_print("ERROR: Input file not found")
         result["error"] = "Input file not found"
-        clean_exit(result)
+        return result
 
     # Load mesh based on file format
     try:
         if input_format == '3mf':
             meshes = load_3mf_file(input_path)  # Returns list of meshes
         else:
-            meshes = [load_stl_file(input_path)]  # Wrap in list for uniform handling
+            meshes = [load_stl_file(input_path, cache=True)]  # Wrap in list for uniform handling
     except Exception as e:
         debug_print(f"ERROR: Failed to load {input_format.upper()} file: {e}")
         result["error"] = f"Failed to load {input_format.upper()} file: {str(e)}"
-        clean_exit(result)
+        return result
 
     if len(meshes) == 0 or (len(meshes) == 1 and meshes[0].CountFacets == 0):
         debug_print("ERROR: Mesh has no facets")
         result["error"] = f"{input_format.upper()} contains no facets"
-        clean_exit(result)
+        return result
+
+    if tolerance is None:
+        bbox = meshes[0].BoundBox
+        for m in meshes[1:]:
+            bbox.add(m.BoundBox)
+        tolerance = min(MAX_TOLERANCE, max(MIN_TOLERANCE, bbox.DiagonalLength * 1e-4))
+        debug_print(f"No tolerance given - using {tolerance} from bounding box diagonal {bbox.DiagonalLength}")
+        result["tolerance"] = tolerance
+        result["tolerance_auto"] = True
 
     total_facets = sum(m.CountFacets for m in meshes)
     debug_print(f"Processing {len(meshes)} mesh object(s) with {total_facets} total facets")
@@ -452,20 +779,24 @@ def convert(input_path, output_path, tolerance=0.01, repair=True, info_only=Fals
 
     # Process each mesh
     processed_meshes = []
+    mesh_is_solid = []
     all_repairs = []
     
     for i, mesh in enumerate(meshes):
         debug_print(f"Processing mesh {i+1} of {len(meshes)} ({mesh.CountFacets} facets)")
         
-        result[f"mesh_info_before_{i}"] = get_mesh_info(mesh, skip_expensive=skip_expensive)
+        info_before = get_mesh_info(mesh, skip_expensive=skip_expensive)
+        result[f"mesh_info_before_{i}"] = info_before
 
         if repair:
             debug_print(f"Repairing mesh {i+1}...")
-            mesh, repairs = repair_mesh(mesh, skip_expensive=skip_expensive)
+            mesh, repairs = repair_mesh(mesh, skip_expensive=skip_expensive, mesh_info=info_before, tolerance=tolerance)
             all_repairs.extend([f"Mesh {i+1}: {r}" for r in repairs])
-            result[f"mesh_info_after_{i}"] = get_mesh_info(mesh, skip_expensive=skip_expensive)
+            info_after = get_mesh_info(mesh, skip_expensive=skip_expensive)
+            result[f"mesh_info_after_{i}"] = info_after
         
         processed_meshes.append(mesh)
+        mesh_is_solid.append(result.get(f"mesh_info_after_{i}", info_before)["is_solid"])
     
     result["repairs"] = all_repairs
     
@@ -478,14 +809,14 @@ def convert(input_path, output_path, tolerance=0.01, repair=True, info_only=Fals
     if info_only:
         debug_print("Info-only mode, exiting")
         result["success"] = True
-        clean_exit(result)
-
-    debug_print("Creating FreeCAD document...")
-    doc = FreeCAD.newDocument("Job")
+        return result
 
     # Convert each mesh to a solid
     solids = []
     shapes = []
+
+    # Use more aggressive tolerance for merging - multiply by 10
+    merge_tolerance = tolerance * 10.0
     
     for i, mesh in enumerate(processed_meshes):
         debug_print(f"Converting mesh {i+1} to shape...")
@@ -496,25 +827,23 @@ def convert(input_path, output_path, tolerance=0.01, repair=True, info_only=Fals
         shape_tolerance = tolerance * 5.0
         debug_print(f"Using shape conversion tolerance: {shape_tolerance}")
         
-        shape = Part.Shape()
-        shape.makeShapeFromMesh(mesh.Topology, shape_tolerance)
+        shape = mesh_to_shape(mesh, tolerance, shape_tolerance)
         debug_print(f"Shape {i+1} conversion complete!")
 
         debug_print(f"Attempting to create solid {i+1}...")
         try:
-            solid = Part.makeSolid(shape)
+            solid = make_solid(shape, mesh_is_solid[i])
             
             # Merge planar faces on this solid NOW (before compound)
-            if not skip_face_merge and mesh.CountFacets <= 100000:
-                debug_print(f"Merging planar faces for solid {i+1}...")
-                # Use more aggressive tolerance for merging - multiply by 10
-                merge_tolerance = tolerance * 10.0
-                debug_print(f"Using merge tolerance: {merge_tolerance}")
+            if skip_face_merge:
+                debug_print(f"Skipping face merge for solid {i+1} (skip_face_merge=True)")
+            elif not needs_face_merge(solid, mesh.CountFacets):
+                debug_print(f"Skipping face merge for solid {i+1} (coplanar faces already merged)")
+            elif mesh.CountFacets <= 100000:
+                debug_print(f"Merging planar faces for solid {i+1} (tolerance {merge_tolerance})...")
                 solid, merged = merge_planar_faces(solid, merge_tolerance)
                 if merged:
                     debug_print(f"Solid {i+1} faces merged successfully")
-            elif skip_face_merge:
-                debug_print(f"Skipping face merge for solid {i+1} (skip_face_merge=True)")
             
             solids.append(solid)
             debug_print(f"Successfully created solid {i+1}")
@@ -522,47 +851,28 @@ def convert(input_path, output_path, tolerance=0.01, repair=True, info_only=Fals
             debug_print(f"Could not create solid {i+1}: {e}, using shell instead")
             shapes.append(shape)
 
-    # Create final object
-    if len(solids) > 0 and len(shapes) == 0:
-        # All meshes converted to solids
-        result["is_solid"] = True
-        if len(solids) == 1:
-            final = solids[0]
-            debug_print("Using single solid")
-        else:
-            # Create compound of all solids
-            debug_print(f"Creating compound of {len(solids)} solids...")
-            final = Part.makeCompound(solids)
-            debug_print("Compound created")
-    elif len(shapes) > 0 and len(solids) == 0:
-        # No solids, using shells
-        result["is_solid"] = False
-        if len(shapes) == 1:
-            final = shapes[0]
-            debug_print("Using single shell")
-        else:
-            debug_print(f"Creating compound of {len(shapes)} shells...")
-            final = Part.makeCompound(shapes)
+    # Create final object - a compound only when there is more than one part
+    all_objects = solids + shapes
+    result["is_solid"] = len(shapes) == 0
+    if len(all_objects) == 1:
+        final = all_objects[0]
+        debug_print(f"Using single {'solid' if solids else 'shell'}")
     else:
-        # Mixed solids and shells
-        result["is_solid"] = False
-        all_objects = solids + shapes
-        if len(all_objects) == 1:
-            final = all_objects[0]
-        else:
-            debug_print(f"Creating compound of {len(all_objects)} objects...")
-            final = Part.makeCompound(all_objects)
+        debug_print(f"Creating compound of {len(solids)} solids and {len(shapes)} shells...")
+        final = Part.makeCompound(all_objects)
 
     # For multi-object 3MF, faces were already merged per-solid
     # Only try compound-level merge for single objects
-    if not skip_face_merge and len(processed_meshes) == 1 and total_facets <= 100000:
-        merge_tolerance = tolerance * 10.0
+    if skip_face_merge:
+        debug_print("Skipping final face merge (skip_face_merge=True)")
+        result["merged_planar_faces"] = False
+    elif len(processed_meshes) == 1 and not needs_face_merge(final, total_facets):
+        debug_print("Skipping removeSplitter - coplanar faces already merged")
+        result["merged_planar_faces"] = True
+    elif len(processed_meshes) == 1 and total_facets <= 100000:
         debug_print(f"Single object - merging with tolerance: {merge_tolerance}")
         final, merged_ok = merge_planar_faces(final, merge_tolerance)
         result["merged_planar_faces"] = merged_ok
-    elif skip_face_merge:
-        debug_print("Skipping final face merge (skip_face_merge=True)")
-        result["merged_planar_faces"] = False
     elif len(processed_meshes) > 1:
         debug_print("Multi-object file - faces already merged per-solid")
         result["merged_planar_faces"] = True
@@ -572,57 +882,132 @@ def convert(input_path, output_path, tolerance=0.01, repair=True, info_only=Fals
         result["merged_planar_faces"] = False
         result["skipped_merge_reason"] = f"Mesh too large ({total_facets} facets)"
 
-    debug_print("Adding object to document...")
-    obj = doc.addObject("Part::Feature", "Mesh")
-    obj.Shape = final
-
     debug_print(f"Exporting to STEP: {output_path}")
-    Import.export([obj], output_path)
+    final.exportStep(output_path)
     debug_print("Export command executed")
 
-    if not os.path.exists(output_path):
+    try:
+        output_size = os.stat(output_path).st_size
+    except FileNotFoundError:
         debug_print("ERROR: STEP file was not created")
         result["error"] = "STEP export failed"
-        clean_exit(result)
+        return result
 
-    output_size = os.path.getsize(output_path)
     debug_print(f"SUCCESS! STEP file created: {output_size} bytes")
 
     result["success"] = True
     result["output_size"] = output_size
 
-    try:
-        FreeCAD.closeDocument(doc.Name)
-    except:
-        pass
-
     debug_print("="*60)
     debug_print("CONVERSION COMPLETE")
     debug_print("="*60)
 
-    clean_exit(result)
+    return result
+
+
+def handle_request(request):
+    """Run one conversion from a JSON request dict, never raises"""
+    if not isinstance(request, dict):
+        return {"success": False, "error": "Invalid request: expected a JSON object"}
+
+    try:
+        result = convert(
+            request["input"],
+            request["output"],
+            None if request.get("tolerance") is None else float(request["tolerance"]),
+            request.get("repair", True),
+            request.get("info_only", False),
+            request.get("format", "stl"),
+            request.get("skip_merge", False),
+        )
+    except Exception as e:
+        debug_print(f"ERROR: Request failed: {e}")
+        result = {"success": False, "error": str(e)}
+
+    if "id" in request:
+        result["id"] = request["id"]
+    return result
+
+
+def serve():
+    """Persistent worker: one JSON request per stdin line, one JSON reply per stdout line"""
+    debug_print("Server mode - waiting for requests on stdin")
+    # FreeCAD is imported by now; tells the caller the worker is warm
+    os.write(ORIGINAL_STDOUT_FD, b"[READY]\n")
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            result = {"success": False, "error": f"Invalid request: {e}"}
+        else:
+            result = handle_request(request)
+        os.write(ORIGINAL_STDOUT_FD, (to_json(result) + "\n").encode())
+
+    debug_print("stdin closed, shutting down")
+    os._exit(0)
+
+
+def run_batch(manifest_path):
+    """Convert every entry of a JSON manifest in this process, returns combined result"""
+    global _mesh_cache, _mesh_cache_bytes
+    debug_print(f"Batch mode - manifest: {manifest_path}")
+    try:
+        with open(manifest_path) as f:
+            requests = json.load(f)
+    except (OSError, ValueError) as e:
+        return {"success": False, "error": f"Failed to read manifest: {e}"}
+
+    if not isinstance(requests, list):
+        return {"success": False, "error": "Manifest must be a JSON list of requests"}
+
+    _mesh_cache = OrderedDict()
+    try:
+        results = [handle_request(request) for request in requests]
+    finally:
+        _mesh_cache = None
+        _mesh_cache_bytes = 0
+    return {
+        "success": all(r["success"] for r in results),
+        "results": results
+    }
 
 
 def main():
     debug_print("main() function called")
     debug_print(f"Arguments: {sys.argv}")
 
-    if len(sys.argv) < 4:
+    argv = sys.argv
+    pretty = len(argv) > 3 and argv[-1] == 'pretty'
+    if pretty:
+        argv = argv[:-1]
+
+    if len(argv) > 2 and argv[2] == 'server':
+        serve()
+
+    if len(argv) > 3 and argv[2] == 'batch':
+        clean_exit(run_batch(argv[3]), pretty)
+
+    if len(argv) < 4:
         os.dup2(ORIGINAL_STDOUT_FD, 1)
-        print("Usage: freecadcmd script.py input_file output_file [tolerance] [repair|no-repair] [format]")
+        print("Usage: freecadcmd script.py input_file output_file [tolerance|auto] [repair|no-repair] [format] [merge|skip-merge] [pretty]")
+        print("       freecadcmd script.py server")
+        print("       freecadcmd script.py batch manifest.json [pretty]")
         sys.exit(1)
 
-    input_file = sys.argv[2]
-    output_file = sys.argv[3]
-    tolerance = float(sys.argv[4]) if len(sys.argv) > 4 else 0.01
-    repair = sys.argv[5].lower() != 'no-repair' if len(sys.argv) > 5 else True
-    input_format = sys.argv[6] if len(sys.argv) > 6 else 'stl'
-    skip_face_merge = sys.argv[7].lower() == 'skip-merge' if len(sys.argv) > 7 else False
+    input_file = argv[2]
+    output_file = argv[3]
+    tolerance = float(argv[4]) if len(argv) > 4 and argv[4] != 'auto' else None
+    repair = argv[5].lower() != 'no-repair' if len(argv) > 5 else True
+    input_format = argv[6] if len(argv) > 6 else 'stl'
+    skip_face_merge = argv[7].lower() == 'skip-merge' if len(argv) > 7 else False
     info_only = False
 
     debug_print(f"Parsed: input={input_file}, output={output_file}, tol={tolerance}, repair={repair}, format={input_format}, skip_face_merge={skip_face_merge}")
 
-    convert(input_file, output_file, tolerance, repair, info_only, input_format, skip_face_merge)
+    clean_exit(convert(input_file, output_file, tolerance, repair, info_only, input_format, skip_face_merge), pretty)
 
 
 debug_print("Calling main() unconditionally (FreeCAD compatibility)")
@@ -54,6 +54,13 @@ async function start() {
     const fc = await converterService.checkFreecad();
     if (!fc.available) logger.warn("FreeCAD NOT FOUND");
 
+    // Load FreeCAD before listening so the health check only passes once
+    // the first job won't pay the import
+    if (fc.available) {
+      const warm = await converterService.warmUp();
+      if (!warm) logger.warn("FreeCAD warm-up did not complete");
+    }
+
     app.listen(config.port, () => {
       logger.info(`Server running on port ${config.port}`);
     });
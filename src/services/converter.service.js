@@ -7,6 +7,9 @@ const logger = require('../utils/logger');
 
 const FREECAD = '/opt/conda/bin/freecadcmd';
 
+// Upper bound on waiting for FreeCAD to load at startup
+const WARMUP_TIMEOUT = 120000;
+
 const FREECAD_ENV = {
   ...process.env,
   QT_QPA_PLATFORM: 'offscreen',
@@ -18,6 +21,145 @@ const FREECAD_ENV = {
 class ConverterService {
   constructor() {
     this.pythonScript = path.join(config.paths.pythonScripts, 'convert.py');
+
+    // Persistent FreeCAD worker (convert.py server mode)
+    this.worker = null;
+    this.workerQueue = Promise.resolve();
+  }
+
+  getWorker() {
+    if (this.worker && this.worker.exitCode === null && !this.worker.killed) {
+      return this.worker;
+    }
+
+    logger.info("Starting persistent FreeCAD worker", { cmd: FREECAD });
+
+    // The worker is long-lived, so resolve OCCT/FreeCAD symbols once at load time
+    // instead of lazily during the first conversion
+    const proc = spawn(FREECAD, [this.pythonScript, 'server'], {
+      env: { ...FREECAD_ENV, LD_BIND_NOW: '1' }
+    });
+
+    // The request in flight on this process; only this process's events settle it
+    proc.pending = null;
+    let buffer = '';
+
+    // Resolves true once the worker has imported FreeCAD, false if it exits first
+    let markReady;
+    proc.ready = new Promise((resolve) => { markReady = resolve; });
+
+    const fail = (error) => {
+      if (proc.pending) {
+        proc.pending.resolve({ success: false, error });
+      }
+    };
+
+    this.worker = proc;
+
+    proc.stdout.on('data', (d) => {
+      buffer += d.toString();
+
+      // Replies are single-line JSON; debug output lines are ignored
+      let newline;
+      while ((newline = buffer.indexOf('\n')) !== -1) {
+        const line = buffer.substring(0, newline).trim();
+        buffer = buffer.substring(newline + 1);
+
+        if (line === '[READY]') {
+          markReady(true);
+          continue;
+        }
+
+        if (!line.startsWith('{') || !proc.pending) continue;
+
+        try {
+          proc.pending.resolve(JSON.parse(line));
+        } catch {
+          logger.error("Failed parsing worker reply", { line: line.substring(0, 200) });
+        }
+      }
+    });
+
+    proc.on('close', (code, signal) => {
+      logger.info("FreeCAD worker exited", { code, signal });
+      if (this.worker === proc) {
+        this.worker = null;
+      }
+      markReady(false);
+      fail(signal === 'SIGKILL' ? 'Conversion was canceled' : 'FreeCAD worker exited unexpectedly');
+    });
+
+    proc.on('error', (err) => {
+      logger.error("Worker spawn error", { error: err.message });
+      markReady(false);
+      fail(err.message);
+    });
+
+    // Writing to a worker that just died raises EPIPE here instead of crashing the server
+    proc.stdin.on('error', (err) => {
+      logger.error("Worker stdin error", { error: err.message });
+      fail(`FreeCAD worker unavailable: ${err.message}`);
+    });
+
+    return proc;
+  }
+
+  runOnWorker(request) {
+    // The worker handles one request at a time
+    const run = () => new Promise((resolve) => {
+      const proc = this.getWorker();
+      let timer = null;
+
+      const finish = (result) => {
+        clearTimeout(timer);
+        if (proc.pending === entry) {
+          proc.pending = null;
+        }
+        resolve(result);
+      };
+
+      const entry = { resolve: finish };
+      proc.pending = entry;
+
+      timer = setTimeout(() => {
+        logger.error("Worker conversion timed out, killing worker", { input: request.input });
+        finish({ success: false, error: 'Conversion timed out' });
+        proc.kill('SIGKILL');
+      }, config.conversion.timeout);
+
+      proc.stdin.write(JSON.stringify(request) + '\n');
+    });
+
+    const promise = this.workerQueue.then(run);
+    this.workerQueue = promise.catch(() => {});
+    return promise;
+  }
+
+  async warmUp() {
+    let timer;
+    const timeout = new Promise((resolve) => {
+      timer = setTimeout(() => resolve(false), WARMUP_TIMEOUT);
+    });
+
+    let loaded;
+    if (config.conversion.persistentWorker) {
+      loaded = this.getWorker().ready;
+    } else {
+      // No worker to keep warm; load FreeCAD once so its libraries are in the
+      // page cache. convert.py without arguments only imports and prints usage.
+      loaded = new Promise((resolve) => {
+        const proc = spawn(FREECAD, [this.pythonScript], {
+          env: FREECAD_ENV,
+          stdio: 'ignore'
+        });
+        proc.on('close', () => resolve(true));
+        proc.on('error', () => resolve(false));
+      });
+    }
+
+    const ready = await Promise.race([loaded, timeout]);
+    clearTimeout(timer);
+    return ready;
   }
 
   extractJson(stdout) {
@@ -48,6 +190,7 @@ class ConverterService {
   }
 
   async convertWithProcess(inputPath, outputPath, options = {}) {
+    // null lets convert.py derive the tolerance from the mesh size
     const tolerance = options.tolerance || config.conversion.defaultTolerance;
     const repair = options.repair !== false;
     const skipFaceMerge = options.skipFaceMerge === true;
@@ -62,11 +205,27 @@ class ConverterService {
       };
     }
 
+    if (config.conversion.persistentWorker) {
+      const request = {
+        input: inputPath,
+        output: outputPath,
+        tolerance,
+        repair,
+        format: inputFormat,
+        skip_merge: skipFaceMerge
+      };
+
+      logger.info("Running FreeCAD conversion on persistent worker", { request });
+
+      const promise = this.runOnWorker(request);
+      return { process: this.getWorker(), promise };
+    }
+
     const args = [
       this.pythonScript,
       inputPath,
       outputPath,
-      tolerance.toString(),
+      tolerance ? tolerance.toString() : 'auto',
       repair ? 'repair' : 'no-repair',
       inputFormat,
       skipFaceMerge ? 'skip-merge' : 'merge'
@@ -138,12 +297,22 @@ class ConverterService {
   }
 
   async getMeshInfo(inputPath, inputFormat = 'stl') {
+    if (config.conversion.persistentWorker) {
+      return this.runOnWorker({
+        input: inputPath,
+        output: '/dev/null',
+        repair: false,
+        format: inputFormat,
+        info_only: true
+      });
+    }
+
     return new Promise((resolve) => {
       const args = [
         this.pythonScript,
         inputPath,
         '/dev/null',
-        '0.01',
+        'auto',
         'no-repair',
         inputFormat
       ];